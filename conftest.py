@@ -0,0 +1,2 @@
+# conftest.py
+# Lets a bare `pytest` run from the repo root import pdf_extractor without installing it.
@@ -1,151 +1,187 @@
 # pdf_extractor/core.py
 
+import hashlib
+import io
 import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from pypdf import PdfReader
+from pypdf import PdfReader, __version__ as pypdf_version
+import numpy as np
 import pandas as pd
+# pandas would otherwise import xlsxwriter lazily in the first ExcelWriter; importing it
+# here means forked batch workers inherit the loaded module instead of each importing it
+import xlsxwriter  # noqa: F401
 
 
-def extract_raw_data(pdf_path: str) -> pd.DataFrame:
+_NODE_REF_RE = re.compile(r"NODE REFERENCE\s*([A-Z0-9]+)")
+
+# The extractors below read fixed rows up to index 96, so nothing past this is needed
+REQUIRED_ROWS = 100
+
+OUTPUT_FORMATS = ("xlsx", "parquet")
+
+
+def extract_raw_data(pdf_path: str, max_rows: int = None, pdf_data: bytes = None) -> tuple:
     """
-    Extracts raw text line-by-line from a PDF and returns it as a pandas DataFrame.
-    Each line is split into tokens, forming columns.
+    Extracts raw text line-by-line from a PDF.
+    Each line is split into tokens, giving a list of rows (lists of strings).
+    Stops reading once max_rows rows have been collected, if given.
+    If pdf_data holds the file's bytes, the PDF is parsed from memory instead of from pdf_path.
+    Returns the rows, the widest row length, and the text of the first page so
+    callers don't need to parse the PDF again.
     """
     all_rows = []
+    max_cols = 0
+    first_page_text = ""
     try:
-        reader = PdfReader(pdf_path)
-        for page in reader.pages:
+        # The fixed row/column indices used by the extractors below depend on how
+        # pypdf splits text into lines and tokens, so don't swap the engine lightly
+        reader = PdfReader(io.BytesIO(pdf_data) if pdf_data is not None else pdf_path)
+        for page_num, page in enumerate(reader.pages):
+            if max_rows is not None and len(all_rows) >= max_rows:
+                break # Skip the remaining pages entirely
             text = page.extract_text()
+            if page_num == 0:
+                first_page_text = text or ""
             if text:
                 for line in text.splitlines():
                     tokens = line.split()
                     all_rows.append(tokens)
+                    if len(tokens) > max_cols:
+                        max_cols = len(tokens)
+                    if max_rows is not None and len(all_rows) >= max_rows:
+                        break
     except Exception as e:
         print(f"Error reading PDF {pdf_path}: {e}")
-        return pd.DataFrame() # Return empty DataFrame on error
+        return [], 0, first_page_text # Return no rows on error
 
-    if not all_rows:
-        return pd.DataFrame() # Return empty if no text extracted
+    return all_rows, max_cols, first_page_text
 
-    max_cols = max(len(row) for row in all_rows)
-    raw_columns = [f"Col{i+1}" for i in range(max_cols)]
-    df_raw = pd.DataFrame(all_rows, columns=raw_columns).fillna("")
-    return df_raw
+def _pad_rows(rows: list, width: int) -> list:
+    """
+    Pads or truncates each row to exactly `width` cells.
+    """
+    return [(row + [""] * width)[:width] for row in rows]
 
-def extract_incoming_pipes(df_raw: pd.DataFrame) -> pd.DataFrame:
+def _join_pipe_size(pipe_rows: list) -> list:
     """
-    Extracts incoming pipe data from the raw DataFrame based on fixed row/column indices.
+    Joins the three pipe size cells (columns 3-5) of each row, skipping empty cells.
+    A plain row join beats chained pandas string ops on these few-row slices.
     """
-    if df_raw.empty or df_raw.shape[0] < 70 or df_raw.shape[1] < 11:
-        print("Warning: Raw DataFrame too small for incoming pipe extraction.")
+    return [" ".join(s for s in (x.strip() for x in row[3:6]) if s) for row in pipe_rows]
+
+def extract_incoming_pipes(raw_rows: list) -> pd.DataFrame:
+    """
+    Extracts incoming pipe data from the raw rows based on fixed row/column indices.
+    """
+    # Only the sliced rows' width matters, not how much of the document was read
+    if len(raw_rows) < 70 or max(len(row) for row in raw_rows[63:70]) < 11:
+        print("Warning: Raw data too small for incoming pipe extraction.")
         return pd.DataFrame(columns=["ID", "UPSTREAM REFERENCE", "PIPE SHAPE", "PIPE SIZE (mm)", 
                                      "BACKDROP DIAM (mm)", "PIPE MATERIAL", "LINING", 
                                      "DEPTH FROM COVER (m)", "INVERT LEVEL (m AD)"])
 
-    pipe_data_in = df_raw.iloc[63:70, 0:11].reset_index(drop=True)
-    pipe_data_in_final = pd.DataFrame()
-    pipe_data_in_final["ID"] = pipe_data_in.iloc[:, 0]
-    pipe_data_in_final["UPSTREAM REFERENCE"] = pipe_data_in.iloc[:, 1]
-    pipe_data_in_final["PIPE SHAPE"] = pipe_data_in.iloc[:, 2]
-    
-    # Handle potential empty cells before concatenation
-    pipe_size_in = (
-        pipe_data_in.iloc[:, 3].fillna('').astype(str).str.strip() + " " +
-        pipe_data_in.iloc[:, 4].fillna('').astype(str).str.strip() + " " +
-        pipe_data_in.iloc[:, 5].fillna('').astype(str).str.strip()
-    )
-    pipe_data_in_final["PIPE SIZE (mm)"] = pipe_size_in.str.strip()
-    pipe_data_in_final["BACKDROP DIAM (mm)"] = pipe_data_in.iloc[:, 6]
-    pipe_data_in_final["PIPE MATERIAL"] = pipe_data_in.iloc[:, 7]
-    pipe_data_in_final["LINING"] = pipe_data_in.iloc[:, 8]
-    pipe_data_in_final["DEPTH FROM COVER (m)"] = pipe_data_in.iloc[:, 9]
-    pipe_data_in_final["INVERT LEVEL (m AD)"] = pipe_data_in.iloc[:, 10]
+    # Work on plain lists; a DataFrame of the slice would only be used to pull columns back out
+    pipe_rows_in = _pad_rows(raw_rows[63:70], 11)
+    pipe_cols_in = [list(col) for col in zip(*pipe_rows_in)]
+    # Collect all columns first so the DataFrame is allocated once
+    pipe_data_in_final = pd.DataFrame({
+        "ID": pipe_cols_in[0],
+        "UPSTREAM REFERENCE": pipe_cols_in[1],
+        "PIPE SHAPE": pipe_cols_in[2],
+        "PIPE SIZE (mm)": _join_pipe_size(pipe_rows_in),
+        "BACKDROP DIAM (mm)": pipe_cols_in[6],
+        "PIPE MATERIAL": pipe_cols_in[7],
+        "LINING": pipe_cols_in[8],
+        "DEPTH FROM COVER (m)": pipe_cols_in[9],
+        "INVERT LEVEL (m AD)": pipe_cols_in[10],
+    }, copy=False)
     return pipe_data_in_final
 
-def extract_outgoing_pipes(df_raw: pd.DataFrame) -> pd.DataFrame:
+def extract_outgoing_pipes(raw_rows: list) -> pd.DataFrame:
     """
-    Extracts outgoing pipe data from the raw DataFrame based on fixed row/column indices.
+    Extracts outgoing pipe data from the raw rows based on fixed row/column indices.
     """
-    if df_raw.empty or df_raw.shape[0] < 85 or df_raw.shape[1] < 12:
-        print("Warning: Raw DataFrame too small for outgoing pipe extraction.")
+    # Only the sliced rows' width matters, not how much of the document was read
+    if len(raw_rows) < 85 or max(len(row) for row in raw_rows[83:85]) < 12:
+        print("Warning: Raw data too small for outgoing pipe extraction.")
         return pd.DataFrame(columns=["ID", "UPSTREAM REFERENCE", "PIPE SHAPE", "PIPE SIZE (mm)", 
                                      "COND", "CRITY", "PIPE MATERIAL", "LINING", 
                                      "DEPTH FROM COVER (m)", "INVERT LEVEL (m AD)"])
 
-    pipe_data_out = df_raw.iloc[83:85, 0:12].reset_index(drop=True)
-    pipe_data_out_final = pd.DataFrame()
-    pipe_data_out_final["ID"] = pipe_data_out.iloc[:, 0]
-    pipe_data_out_final["UPSTREAM REFERENCE"] = pipe_data_out.iloc[:, 1]
-    pipe_data_out_final["PIPE SHAPE"] = pipe_data_out.iloc[:, 2]
-    
-    # Handle potential empty cells before concatenation
-    pipe_data_out_final["PIPE SIZE (mm)"] = (
-        pipe_data_out.iloc[:, 3].fillna('').astype(str).str.strip() + " " +
-        pipe_data_out.iloc[:, 4].fillna('').astype(str).str.strip() + " " +
-        pipe_data_out.iloc[:, 5].fillna('').astype(str).str.strip()
-    ).str.strip() # Strip again after concat
-
-    pipe_data_out_final["COND"] = pipe_data_out.iloc[:, 6]
-    pipe_data_out_final["CRITY"] = pipe_data_out.iloc[:, 7]
-    pipe_data_out_final["PIPE MATERIAL"] = pipe_data_out.iloc[:, 8]
-    pipe_data_out_final["LINING"] = pipe_data_out.iloc[:, 9]
-    pipe_data_out_final["DEPTH FROM COVER (m)"] = pipe_data_out.iloc[:, 10]
-    pipe_data_out_final["INVERT LEVEL (m AD)"] = pipe_data_out.iloc[:, 11]
+    # Work on plain lists; a DataFrame of the slice would only be used to pull columns back out
+    pipe_rows_out = _pad_rows(raw_rows[83:85], 12)
+    pipe_cols_out = [list(col) for col in zip(*pipe_rows_out)]
+    # Collect all columns first so the DataFrame is allocated once
+    pipe_data_out_final = pd.DataFrame({
+        "ID": pipe_cols_out[0],
+        "UPSTREAM REFERENCE": pipe_cols_out[1],
+        "PIPE SHAPE": pipe_cols_out[2],
+        "PIPE SIZE (mm)": _join_pipe_size(pipe_rows_out),
+        "COND": pipe_cols_out[6],
+        "CRITY": pipe_cols_out[7],
+        "PIPE MATERIAL": pipe_cols_out[8],
+        "LINING": pipe_cols_out[9],
+        "DEPTH FROM COVER (m)": pipe_cols_out[10],
+        "INVERT LEVEL (m AD)": pipe_cols_out[11],
+    }, copy=False)
     return pipe_data_out_final
 
-def extract_location_data(df_raw: pd.DataFrame) -> pd.DataFrame:
+def extract_location_data(raw_rows: list) -> pd.DataFrame:
     """
-    Extracts location and other general details from the raw DataFrame.
+    Extracts location and other general details from the raw rows.
     Uses index-based access, with bounds checks for robustness.
     """
-    # Helper to safely get value from DataFrame
-    def get_val(df, row, col):
-        return str(df.iloc[row, col]).strip() if df.shape[0] > row and df.shape[1] > col else ""
+    # Helper to safely get value from the raw rows
+    def get_val(rows, row, col):
+        return rows[row][col].strip() if len(rows) > row and len(rows[row]) > col else ""
 
     # Helper to safely join a row range
-    def join_row_range(df, row, start_col, end_col=None):
-        if df.shape[0] <= row: return ""
-        cols_to_use = df.iloc[row, start_col:end_col].tolist() if end_col is not None else df.iloc[row, start_col:].tolist()
-        return " ".join(str(x).strip() for x in cols_to_use if pd.notna(x) and str(x).strip())
+    def join_row_range(rows, row, start_col, end_col=None):
+        if len(rows) <= row: return ""
+        cols_to_use = rows[row][start_col:end_col]
+        return " ".join(x.strip() for x in cols_to_use if x.strip())
 
 
-    node_reference_value = get_val(df_raw, 8, 2)
+    node_reference_value = get_val(raw_rows, 8, 2)
 
-    coord_text = get_val(df_raw, 9, 2)
+    coord_text = get_val(raw_rows, 9, 2)
     x_ref = y_ref = ""
     if "," in coord_text:
         parts = coord_text.split(",")
         if len(parts) >= 2:
             x_ref, y_ref = parts[0].strip(), parts[1].strip()
 
-    location_str = join_row_range(df_raw, 10, 1)
-    drainage_code = get_val(df_raw, 12, 1)
-    survey_date = join_row_range(df_raw, 13, 2)
-    Year_Laid = get_val(df_raw, 15, 2)
-    status_pr = get_val(df_raw, 15, 4)
-    Function_pr = get_val(df_raw, 15, 6)
-    Node_type = get_val(df_raw, 16, 1)
-    Cover_shape = get_val(df_raw, 19, 2)
-    Hinged_st = get_val(df_raw, 19, 4)
-    Lock_st = get_val(df_raw, 19, 6)
-    Duty_st = get_val(df_raw, 19, 8)
-    Cover_size = join_row_range(df_raw, 19, 9)
-    Side_entry = get_val(df_raw, 26, 1)
-    Reg_course = get_val(df_raw, 27, 1)
-    Depth = get_val(df_raw, 28, 1)
-    Shaft_size = join_row_range(df_raw, 28, 2, 5) # Explicit end_col
-    Soffit = get_val(df_raw, 30, 2)
-    Steps = get_val(df_raw, 32, 0)
-    Ladders = get_val(df_raw, 34, 1)
-    Landings = get_val(df_raw, 34, 3)
-    Chamber_size = join_row_range(df_raw, 34, 4, 7) # Explicit end_col
-    Flow_depth = get_val(df_raw, 38, 2)
-    Silting = get_val(df_raw, 39, 2)
-    Surch = get_val(df_raw, 44, 0)
-    MH_cover = get_val(df_raw, 47, 2)
-
-    notes_95 = get_val(df_raw, 95, 0)
-    notes_96 = join_row_range(df_raw, 96, 0)
+    location_str = join_row_range(raw_rows, 10, 1)
+    drainage_code = get_val(raw_rows, 12, 1)
+    survey_date = join_row_range(raw_rows, 13, 2)
+    Year_Laid = get_val(raw_rows, 15, 2)
+    status_pr = get_val(raw_rows, 15, 4)
+    Function_pr = get_val(raw_rows, 15, 6)
+    Node_type = get_val(raw_rows, 16, 1)
+    Cover_shape = get_val(raw_rows, 19, 2)
+    Hinged_st = get_val(raw_rows, 19, 4)
+    Lock_st = get_val(raw_rows, 19, 6)
+    Duty_st = get_val(raw_rows, 19, 8)
+    Cover_size = join_row_range(raw_rows, 19, 9)
+    Side_entry = get_val(raw_rows, 26, 1)
+    Reg_course = get_val(raw_rows, 27, 1)
+    Depth = get_val(raw_rows, 28, 1)
+    Shaft_size = join_row_range(raw_rows, 28, 2, 5) # Explicit end_col
+    Soffit = get_val(raw_rows, 30, 2)
+    Steps = get_val(raw_rows, 32, 0)
+    Ladders = get_val(raw_rows, 34, 1)
+    Landings = get_val(raw_rows, 34, 3)
+    Chamber_size = join_row_range(raw_rows, 34, 4, 7) # Explicit end_col
+    Flow_depth = get_val(raw_rows, 38, 2)
+    Silting = get_val(raw_rows, 39, 2)
+    Surch = get_val(raw_rows, 44, 0)
+    MH_cover = get_val(raw_rows, 47, 2)
+
+    notes_95 = get_val(raw_rows, 95, 0)
+    notes_96 = join_row_range(raw_rows, 96, 0)
     Notes = (notes_95 + " " + notes_96).strip()
 
     location_data = {
@@ -168,36 +204,74 @@ def extract_location_data(df_raw: pd.DataFrame) -> pd.DataFrame:
     }
     return pd.DataFrame(location_data)
 
-def process_pdf(pdf_path: str, output_excel: str) -> None:
+def process_pdf(pdf_path: str, output_excel: str, include_raw: bool = False,
+                output_format: str = "xlsx", pdf_data: bytes = None) -> bool:
     """
     Processes a single PDF file, extracts data, and saves it to a multi-sheet Excel file.
+    The diagnostic "Raw Data" sheet is only written when include_raw is True.
+    With output_format="parquet", each sheet is instead written as a Parquet file into a
+    directory named after output_excel without its extension.
+    Pass pdf_data when the file's bytes have already been read to avoid reading it again.
+    Returns True if output was written, False if the PDF was skipped.
     """
-    df_raw = extract_raw_data(pdf_path)
-    if df_raw.empty:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+
+    # The full text is only needed for the Raw Data sheet
+    max_rows = None if include_raw else REQUIRED_ROWS
+    raw_rows, max_cols, first_page_text = extract_raw_data(pdf_path, max_rows, pdf_data)
+    if not raw_rows:
         print(f"Skipping {pdf_path}: No raw data extracted.")
-        return
+        return False
 
-    pipe_data_in_final = extract_incoming_pipes(df_raw)
-    pipe_data_out_final = extract_outgoing_pipes(df_raw)
-    df_location = extract_location_data(df_raw)
+    pipe_data_in_final = extract_incoming_pipes(raw_rows)
+    pipe_data_out_final = extract_outgoing_pipes(raw_rows)
+    df_location = extract_location_data(raw_rows)
 
     # Extract node reference for the Excel filename (or sheet content)
     # Using a more robust check in case column 2 is missing or too short
-    node_reference_value = df_raw.iloc[8, 2] if df_raw.shape[0] > 8 and df_raw.shape[1] > 2 else ''
+    node_reference_value = raw_rows[8][2] if len(raw_rows) > 8 and len(raw_rows[8]) > 2 else ''
     if not node_reference_value: # Fallback if direct access fails
         # Try to find it using a more general regex if direct indexing is unreliable
-        text_content = PdfReader(pdf_path).pages[0].extract_text()
-        match = re.search(r"NODE REFERENCE\s*([A-Z0-9]+)", text_content)
+        # Reuse the first page text from extract_raw_data instead of re-parsing the PDF
+        text_content = first_page_text
+        match = _NODE_REF_RE.search(text_content)
         if match:
             node_reference_value = match.group(1)
         else:
             node_reference_value = "UNKNOWN_NODE" # Default if not found
 
-    with pd.ExcelWriter(output_excel, engine="xlsxwriter") as writer:
-        df_raw.to_excel(writer, sheet_name="Raw Data", index=False)
+    if output_format == "parquet":
+        # Columnar output for programmatic consumers. There is no B1 cell here, so
+        # store the resolved node reference (including the regex fallback) in the
+        # location data's "Node Reference" row instead
+        df_location.loc[df_location["COMPONENTS"] == "Node Reference", "VALUE"] = node_reference_value
+        out_dir = Path(output_excel).with_suffix("")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if include_raw:
+            raw_columns = [f"Col{i+1}" for i in range(max_cols)]
+            df_raw = pd.DataFrame(_pad_rows(raw_rows, max_cols), columns=raw_columns)
+            df_raw.to_parquet(out_dir / "raw_data.parquet", index=False)
+        df_location.to_parquet(out_dir / "location.parquet", index=False)
+        pipe_data_in_final.to_parquet(out_dir / "incoming_pipes.parquet", index=False)
+        pipe_data_out_final.to_parquet(out_dir / "outgoing_pipes.parquet", index=False)
+        return True
 
+    # constant_memory flushes each row to disk once it is complete, so every
+    # sheet below has to be written strictly top to bottom, one row at a time
+    # (DataFrame.to_excel writes column by column and can't be used here)
+    with pd.ExcelWriter(output_excel, engine="xlsxwriter",
+                        engine_kwargs={'options': {'constant_memory': True}}) as writer:
         workbook = writer.book
         bold_format = workbook.add_format({'bold': True})
+
+        if include_raw:
+            ws = workbook.add_worksheet("Raw Data")
+            # Same header style pandas uses for to_excel
+            header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            ws.write_row(0, 0, [f"Col{i+1}" for i in range(max_cols)], header_format)
+            for row_num, row in enumerate(raw_rows, start=1):
+                ws.write_row(row_num, 0, row)
         
         sheets_with_node = {
             "Location Details": df_location,
@@ -212,48 +286,164 @@ def process_pdf(pdf_path: str, output_excel: str) -> None:
             ws.write('A1', "Node Reference", bold_format)
             ws.write('B1', node_reference_value) # Write value in B1
             
-            # Write DataFrame headers starting from row 2 (index 1)
-            # and data starting from row 3 (index 2)
-            for col_num, col_name in enumerate(df.columns):
-                ws.write(2, col_num, col_name, bold_format)
-                for row_num, value in enumerate(df[col_name]):
-                    # Adjust row_num by 3 because A1/B1 for node ref, and row 2 for headers
-                    ws.write(row_num + 3, col_num, value)
+            # Write DataFrame headers in row 3 (index 2)
+            ws.write_row(2, 0, df.columns.tolist(), bold_format)
+            
+            # Write the data a row at a time starting from row 4 (index 3)
+            for row_num, values in enumerate(df.itertuples(index=False, name=None), start=3):
+                ws.write_row(row_num, 0, values)
             
-            # Auto-adjust column widths
+            # Auto-adjust column widths, measuring every cell at once in numpy
+            cell_lens = np.char.str_len(df.astype(str).to_numpy(dtype=str))
+            data_widths = cell_lens.max(axis=0, initial=0)
             for i, col in enumerate(df.columns):
-                series = df[col].astype(str)
                 # Max length should consider header (row 2) and data
-                max_len = max(series.map(len).max(), len(str(col))) + 2
+                max_len = max(int(data_widths[i]), len(str(col))) + 2
                 ws.set_column(i, i, max_len)
             
             # Adjust column width for Node Reference columns
             # Assuming "Node Reference" in A1 and its value in B1, adjust A and B
             ws.set_column('A:A', max(len("Node Reference"), len(node_reference_value)) + 2)
             ws.set_column('B:B', len(node_reference_value) + 2) # If B1 is value, adjust its column
+    return True
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pdf_extractor")
+
+
+def _code_fingerprint() -> str:
+    """
+    Returns a short hash of this module's source and the pypdf version, so any change
+    to the extraction or workbook code (or the parser) invalidates cached workbooks.
+    """
+    h = hashlib.blake2b(digest_size=6)
+    with open(__file__, "rb") as f:
+        h.update(f.read())
+    h.update(pypdf_version.encode())
+    return h.hexdigest()
+
+_CACHE_TAG = _code_fingerprint()
+
+
+def _hash_pdf(pdf_data: bytes) -> str:
+    """
+    Returns a BLAKE2b fingerprint of the PDF contents.
+    """
+    return hashlib.blake2b(pdf_data, digest_size=16).hexdigest()
+
+def _process_pdf_cached(pdf_path: str, output_excel: str, cache_dir: str = None,
+                        include_raw: bool = False, output_format: str = "xlsx") -> None:
+    """
+    Runs process_pdf, reusing a previously generated workbook when a PDF with
+    identical contents has already been processed.
+    """
+    # Only single-file workbooks are cached; Parquet output is a directory
+    if cache_dir is None or output_format != "xlsx":
+        process_pdf(pdf_path, output_excel, include_raw, output_format)
+        return
+
+    # Read the file once; the same bytes are hashed and, on a cache miss, parsed
+    with open(pdf_path, "rb") as f:
+        pdf_data = f.read()
+
+    # Workbooks with and without the Raw Data sheet are cached separately
+    cache_name = f"{_hash_pdf(pdf_data)}-{_CACHE_TAG}" + ("-raw" if include_raw else "") + ".xlsx"
+    cache_path = os.path.join(cache_dir, cache_name)
+    if os.path.exists(cache_path):
+        shutil.copyfile(cache_path, output_excel)
+        return
+
+    # Write to a worker-private file so only this PDF's own output can reach the
+    # cache, then rename it into place so other workers never see a partial file
+    tmp_path = os.path.join(cache_dir, f"{cache_name}.{os.getpid()}.tmp.xlsx")
+    try:
+        if process_pdf(pdf_path, tmp_path, include_raw, pdf_data=pdf_data):
+            shutil.copyfile(tmp_path, output_excel)
+            os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _iter_pdfs(folder: str):
+    """
+    Recursively yields (directory, filename) for every PDF under folder.
+    os.scandir entries carry their file type, avoiding the extra stat calls of os.walk.
+    Like os.walk, unreadable directories are skipped and symlinked directories aren't followed.
+    """
+    try:
+        entries = os.scandir(folder)
+    except OSError:
+        return
+    subdirs = []
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                yield folder, entry.name
+    for subdir in subdirs:
+        yield from _iter_pdfs(subdir)
 
 
 # Main script execution logic (now part of the package's main usage or an example)
 # This part would typically be in a separate script that imports your package
 # and calls the process_pdf function.
-def run_processing_batch(input_folder: str, output_folder: str) -> list:
+def run_processing_batch(input_folder: str, output_folder: str, cache_dir: str = DEFAULT_CACHE_DIR,
+                         include_raw: bool = False, output_format: str = "xlsx") -> list:
     """
     Walks through the input folder, processes all PDFs, and saves results to the output folder.
+    PDFs whose contents match a previous run are copied from cache_dir instead of being
+    re-extracted; pass cache_dir=None to disable caching. Set include_raw to also write
+    the "Raw Data" sheet, and output_format="parquet" to write Parquet files instead of Excel.
     Returns a list of paths to PDFs that failed processing.
     """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format {output_format!r}, expected one of {OUTPUT_FORMATS}")
+    # Tolerate stray whitespace around pasted folder paths
+    input_folder = input_folder.strip()
+    output_folder = output_folder.strip()
     os.makedirs(output_folder, exist_ok=True)
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
     failed_pdfs = []
 
-    for root, dirs, files in os.walk(input_folder):
-        for file in files:
-            if file.lower().endswith(".pdf"):
-                pdf_path = os.path.join(root, file)
-                excel_filename = Path(file).stem + ".xlsx"
-                output_excel_path = os.path.join(output_folder, excel_filename)
-                print(f"Processing {pdf_path} -> {output_excel_path}")
-                try:
-                    process_pdf(pdf_path, output_excel_path)
-                except Exception as e:
-                    print(f"Error processing {pdf_path}: {e}")
-                    failed_pdfs.append(pdf_path)
-    return failed_pdfs
\ No newline at end of file
+    # Each PDF has its own input and output path, so files can be processed
+    # independently. Processes (not threads) are used because text extraction
+    # is CPU-bound Python code.
+    jobs = []
+    claimed_outputs = {}
+    for root, file in _iter_pdfs(input_folder):
+        pdf_path = os.path.join(root, file)
+        output_excel_path = os.path.join(output_folder, os.path.splitext(file)[0] + ".xlsx")
+        # PDFs with the same name in different subfolders would map to the same output,
+        # and two workers must never write one file at once, so only the first is kept
+        output_key = os.path.normcase(output_excel_path)
+        if output_key in claimed_outputs:
+            print(f"Error processing {pdf_path}: output {output_excel_path} is already used by "
+                  f"{claimed_outputs[output_key]}")
+            failed_pdfs.append(pdf_path)
+            continue
+        claimed_outputs[output_key] = pdf_path
+        jobs.append((pdf_path, output_excel_path))
+    if not jobs:
+        return failed_pdfs
+
+    max_workers = min(os.cpu_count() or 1, 8, len(jobs))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for pdf_path, output_excel_path in jobs:
+            # Parquet output goes to a directory named after the workbook
+            target = output_excel_path if output_format == "xlsx" else os.path.splitext(output_excel_path)[0]
+            print(f"Processing {pdf_path} -> {target}")
+            future = executor.submit(_process_pdf_cached, pdf_path, output_excel_path,
+                                     cache_dir, include_raw, output_format)
+            futures[future] = pdf_path
+        for future in as_completed(futures):
+            pdf_path = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Error processing {pdf_path}: {e}")
+                failed_pdfs.append(pdf_path)
+    return failed_pdfs
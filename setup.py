@@ -9,9 +9,13 @@ setup(
     install_requires=[
         'pypdf',    # For PDF reading and processing
         'pandas',   # For DataFrame manipulation
+        'numpy',    # For column width calculation
         'xlsxwriter', # For writing Excel files
         
     ],
+    extras_require={
+        'parquet': ['pyarrow'], # For output_format='parquet'
+    },
     
     # Metadata 
     author='Anurag Kashyap',
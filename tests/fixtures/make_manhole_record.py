@@ -0,0 +1,72 @@
+# tests/fixtures/make_manhole_record.py
+# Regenerates manhole_record.pdf. Needs reportlab (see requirements-dev.txt).
+
+from reportlab.lib.pagesizes import A3
+from reportlab.pdfgen import canvas
+
+# Each row is a list of table cells; every cell is placed as its own text run
+ROWS = {
+    0: ["MANHOLE SURVEY RECORD"],
+    8: ["NODE REFERENCE", "MH1234"],
+    9: ["GRID REF", "512345.1,178234.5"],
+    10: ["LOCATION", "12 High Street Anytown"],
+    12: ["DRAINAGE", "AB12"],
+    13: ["SURVEY DATE", "14 Mar 2023"],
+    15: ["YEAR LAID", "1975", "STATUS", "Active", "FUNCTION", "Foul"],
+    16: ["TYPE", "Manhole"],
+    19: ["COVER SHAPE", "Circular", "HINGED", "No", "LOCKED", "No", "DUTY", "Heavy", "600 x 600"],
+    26: ["ENTRY", "No"],
+    27: ["COURSES", "2"],
+    28: ["DEPTH", "2.45", "1200 x 900", "mm"],
+    30: ["SOFFIT LEVEL", "1.80"],
+    32: ["Yes", "STEPS"],
+    34: ["LADDERS", "No", "LANDINGS", "0", "1500 x 1200"],
+    38: ["FLOW DEPTH", "50"],
+    39: ["SILT DEPTH", "10"],
+    44: ["0", "SURCHARGE"],
+    47: ["COVER LEVEL", "45.67"],
+    63: ["A", "MH1230", "Circular", "225 x 225", "0", "VC", "None", "2.10", "43.57"],
+    64: ["B", "MH1231", "Circular", "150 - -", "0", "PVC", "None", "2.20", "43.47"],
+    65: ["C", "-", "-", "- - -", "-", "-", "-", "-", "-"],
+    66: ["D", "-", "-", "- - -", "-", "-", "-", "-", "-"],
+    67: ["E", "-", "-", "- - -", "-", "-", "-", "-", "-"],
+    68: ["F", "-", "-", "- - -", "-", "-", "-", "-", "-"],
+    69: ["G", "-", "-", "- - -", "-", "-", "-", "-", "-"],
+    83: ["X", "MH1235", "Circular", "300 x 300", "Good", "2", "VC", "None", "2.45", "43.22"],
+    84: ["Y", "-", "-", "- - -", "-", "-", "-", "-", "-", "-"],
+    95: ["Notes:"],
+    96: ["Cover rocking slightly"],
+}
+ROW_COUNT = 100
+LEADING = 11
+LABEL_WIDTH = 110
+CELL_WIDTH = 70
+
+
+def main(path="manhole_record.pdf"):
+    width, height = A3
+    c = canvas.Canvas(path, pagesize=A3)
+    top = height - 40
+    # Table borders drawn before the text, as on the real record sheets
+    c.rect(20, top - ROW_COUNT * LEADING, width - 40, ROW_COUNT * LEADING + 12)
+    for i in range(ROW_COUNT):
+        y = top - i * LEADING
+        c.line(20, y - 3, width - 20, y - 3)
+    for j in range(10):
+        x = 25 + LABEL_WIDTH + j * CELL_WIDTH
+        c.line(x, top + 9, x, top - ROW_COUNT * LEADING + 8)
+    for i in range(ROW_COUNT):
+        y = top - i * LEADING
+        text = c.beginText()
+        text.setFont("Helvetica", 8)
+        for j, cell in enumerate(ROWS.get(i, [f"FIELD {i}"])):
+            # Position each cell in its own column rather than drawing the row as one string
+            x = 30 if j == 0 else 30 + LABEL_WIDTH + (j - 1) * CELL_WIDTH
+            text.setTextOrigin(x, y)
+            text.textOut(cell)
+        c.drawText(text)
+    c.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# tests/test_core.py
+
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from pdf_extractor.core import (
+    REQUIRED_ROWS,
+    _CACHE_TAG,
+    _process_pdf_cached,
+    extract_incoming_pipes,
+    extract_location_data,
+    extract_outgoing_pipes,
+    extract_raw_data,
+    process_pdf,
+    run_processing_batch,
+)
+
+FIXTURE_PDF = os.path.join(os.path.dirname(__file__), "fixtures", "manhole_record.pdf")
+
+
+def _location_values(raw_rows):
+    df = extract_location_data(raw_rows)
+    return dict(zip(df["COMPONENTS"], df["VALUE"]))
+
+
+def test_extract_raw_data_reads_fixed_rows():
+    # The fixture places every table cell as its own text run. The extractors index
+    # these rows by position, so pin the exact lines and tokens the engine produces.
+    raw_rows, max_cols, first_page_text = extract_raw_data(FIXTURE_PDF)
+    assert len(raw_rows) == 100
+    assert max_cols == 12
+    assert raw_rows[8] == ["NODE", "REFERENCE", "MH1234"]
+    assert raw_rows[15] == ["YEAR", "LAID", "1975", "STATUS", "Active", "FUNCTION", "Foul"]
+    assert raw_rows[19] == ["COVER", "SHAPE", "Circular", "HINGED", "No", "LOCKED", "No",
+                            "DUTY", "Heavy", "600", "x", "600"]
+    assert raw_rows[63] == ["A", "MH1230", "Circular", "225", "x", "225", "0", "VC",
+                            "None", "2.10", "43.57"]
+    assert raw_rows[83] == ["X", "MH1235", "Circular", "300", "x", "300", "Good", "2", "VC",
+                            "None", "2.45", "43.22"]
+    assert raw_rows[96] == ["Cover", "rocking", "slightly"]
+    assert first_page_text.splitlines()[8].split() == ["NODE", "REFERENCE", "MH1234"]
+
+
+def test_extract_raw_data_stops_at_max_rows():
+    raw_rows, _, _ = extract_raw_data(FIXTURE_PDF, max_rows=20)
+    assert len(raw_rows) == 20
+
+
+def test_extract_location_data():
+    raw_rows, _, _ = extract_raw_data(FIXTURE_PDF)
+    values = _location_values(raw_rows)
+    assert values["Node Reference"] == "MH1234"
+    assert values["Coordinates X"] == "512345.1"
+    assert values["Coordinates Y"] == "178234.5"
+    assert values["Location"] == "12 High Street Anytown"
+    assert values["Drainage Area Code"] == "AB12"
+    assert values["Survey Date"] == "14 Mar 2023"
+    assert values["Year Laid"] == "1975"
+    assert values["Status"] == "Active"
+    assert values["Function"] == "Foul"
+    assert values["Cover Size"] == "600 x 600"
+    assert values["Shaft Size"] == "1200 x 900"
+    assert values["Chamber Size"] == "1500 x 1200"
+    assert values["Cover Level (m AD)"] == "45.67"
+    assert values["Notes"] == "Notes: Cover rocking slightly"
+
+
+def test_extract_incoming_pipes():
+    raw_rows, _, _ = extract_raw_data(FIXTURE_PDF)
+    pipes = extract_incoming_pipes(raw_rows)
+    assert len(pipes) == 7
+    assert pipes.iloc[0].tolist() == ["A", "MH1230", "Circular", "225 x 225", "0", "VC", "None", "2.10", "43.57"]
+    assert pipes.iloc[1]["PIPE SIZE (mm)"] == "150 - -"
+
+
+def test_extract_outgoing_pipes():
+    raw_rows, _, _ = extract_raw_data(FIXTURE_PDF)
+    pipes = extract_outgoing_pipes(raw_rows)
+    assert len(pipes) == 2
+    assert pipes.iloc[0].tolist() == ["X", "MH1235", "Circular", "300 x 300", "Good", "2", "VC", "None", "2.45", "43.22"]
+
+
+def test_pipe_extraction_ignores_rows_past_the_read_limit():
+    # The only 12-token row sits past REQUIRED_ROWS, as on a later page. Reading the
+    # whole document (include_raw=True) must not change which pipes are extracted.
+    raw_rows = [["FIELD", str(i)] for i in range(150)]
+    for i in range(63, 70):
+        raw_rows[i] = [f"r{i}c{j}" for j in range(11)]
+    raw_rows[120] = [f"wide{j}" for j in range(12)]
+
+    full_in = extract_incoming_pipes(raw_rows)
+    full_out = extract_outgoing_pipes(raw_rows)
+    assert len(full_in) == 7
+    assert full_in.equals(extract_incoming_pipes(raw_rows[:REQUIRED_ROWS]))
+    assert full_out.empty
+    assert extract_outgoing_pipes(raw_rows[:REQUIRED_ROWS]).empty
+
+def test_cache_skips_unreadable_pdf_with_stale_output(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    output = tmp_path / "record.xlsx"
+    _process_pdf_cached(FIXTURE_PDF, str(output), str(cache_dir))
+    cached = sorted(os.listdir(cache_dir))
+    assert len(cached) == 1
+    # Cache entries are tied to the current extraction code
+    assert _CACHE_TAG in cached[0]
+
+    # A corrupt PDF mapped to the same output must not cache the earlier workbook
+    corrupt = tmp_path / "record.pdf"
+    corrupt.write_bytes(b"not a pdf")
+    _process_pdf_cached(str(corrupt), str(output), str(cache_dir))
+    assert sorted(os.listdir(cache_dir)) == cached
+
+
+def test_batch_fails_pdfs_that_share_an_output_name(tmp_path):
+    input_dir = tmp_path / "in"
+    (input_dir / "sub").mkdir(parents=True)
+    shutil.copyfile(FIXTURE_PDF, input_dir / "record.pdf")
+    shutil.copyfile(FIXTURE_PDF, input_dir / "sub" / "record.pdf")
+    output_dir = tmp_path / "out"
+
+    failed = run_processing_batch(str(input_dir), str(output_dir), cache_dir=None)
+
+    assert failed == [str(input_dir / "sub" / "record.pdf")]
+    assert os.listdir(output_dir) == ["record.xlsx"]
+
+
+def test_parquet_location_keeps_fallback_node_reference(tmp_path):
+    pytest.importorskip("pyarrow")
+    reportlab_canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    # Row 8 has no third token, so the node reference comes from the regex fallback
+    lines = [f"FIELD {i}" for i in range(8)] + ["NODE REFERENCE", "MH77"]
+    pdf_path = tmp_path / "record.pdf"
+    c = reportlab_canvas.Canvas(str(pdf_path))
+    for i, line in enumerate(lines):
+        c.drawString(30, 800 - i * 12, line)
+    c.save()
+
+    assert process_pdf(str(pdf_path), str(tmp_path / "record.xlsx"), output_format="parquet")
+
+    location = pd.read_parquet(tmp_path / "record" / "location.parquet")
+    assert location.iloc[0].tolist() == ["Node Reference", "MH77"]